@@ -1,49 +1,126 @@
 import os
+import re
+from functools import lru_cache
 from dotenv import load_dotenv
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_groq import ChatGroq
-from langchain.chains import RetrievalQA
-from langchain_core.documents import Document
-from langchain_core.prompts import PromptTemplate
-
-def schema_to_mongo_nl(nl_query: str, mongo_schema: dict):
-    load_dotenv()
-    groq_api_key = os.getenv("GROQ_API_KEY")
+from schema_introspect import IntrospectedSchema
+
+# langchain / sentence-transformers are imported inside the functions below so
+# that importing this module (and execute.py) stays cheap.
+
+@lru_cache(maxsize=1)
+def get_embedding_model():
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+
+SCHEMA_TOP_K = 6
+# Field values that are ordinary English words are not used to pick fields
+COMMON_WORDS = {"yes", "no", "none", "other", "others", "unknown", "true", "false", "all", "any"}
+
+def describe_field(path, stats):
+    parts = [" | ".join(stats["types"])]
+    if "values" in stats:
+        parts.append("values: " + ", ".join(str(v) for v in stats["values"]))
+    if "min" in stats:
+        parts.append(f"range: {stats['min']} to {stats['max']}")
+    if stats.get("indexed"):
+        parts.append("indexed")
+    return f"{path}: " + "; ".join(parts)
 
-    flat_schema = []
+def field_keywords(path, stats=None):
+    name = path.split('.')[-1].replace('[]', '').lower()
+    # Every collection has an _id; matching "id" would pull in all of them
+    if name == "_id":
+        return set()
+    keywords = {name, name.replace('_', ' ').strip()}
+    # Two-valued flags (yes/no) are found by name; their values are too generic
+    if stats and len(stats.get("values", [])) > 2:
+        keywords.update(
+            str(value).lower() for value in stats["values"]
+            if str(value).lower() not in COMMON_WORDS
+        )
+    return keywords
 
-    def flatten_schema(inp, prefix=""):
+def flatten_schema(mongo_schema: dict):
+    """Turn a schema into (line, keywords) pairs, one per field.
+
+    Accepts both an IntrospectedSchema ({collection: {field path: stats}})
+    and nested hand-written schemas whose leaves are type names."""
+    if isinstance(mongo_schema, IntrospectedSchema):
+        return [
+            (describe_field(f"{collection}.{path}", stats), field_keywords(path, stats))
+            for collection, field_stats in mongo_schema.items()
+            for path, stats in field_stats.items()
+        ]
+
+    fields = []
+
+    def walk(inp, prefix=""):
         for k, v in inp.items():
             if isinstance(v, dict):
-                flatten_schema(v, prefix + k + '.')
+                walk(v, prefix + k + '.')
             elif isinstance(v, list):
-                flatten_schema(v[0], prefix + k + '[].')
+                walk(v[0], prefix + k + '[].')
             else:
-                flat_schema.append(f"{prefix}{k}: {v}")
+                fields.append((f"{prefix}{k}: {v}", field_keywords(k)))
+
+    walk(mongo_schema)
+    return fields
+
+@lru_cache(maxsize=4)
+def _schema_vector_store(lines: tuple):
+    # Re-embedded only when the schema itself changes, not on every question
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
 
-    flatten_schema(mongo_schema)
+    docs = [Document(page_content=line) for line in lines]
+    return FAISS.from_documents(docs, get_embedding_model())
 
-    docs = [Document(page_content=line) for line in flat_schema]
-    embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    vect_store = FAISS.from_documents(docs, embedding_model)
-    retriever = vect_store.as_retriever(search_kwargs={"k": 4})
+def relevant_schema_lines(nl_query: str, mongo_schema: dict, k: int = SCHEMA_TOP_K):
+    fields = flatten_schema(mongo_schema)
+    lines = tuple(line for line, _ in fields)
+    if not lines:
+        raise ValueError("The schema has no fields; check that DB_NAME points at a populated database.")
+    question = nl_query.lower()
+
+    # Fields named in the question, or whose known values are, always make it in
+    selected = {
+        line for line, keywords in fields
+        if any(re.search(r'\b' + re.escape(word) + r'\b', question) for word in keywords)
+    }
+    for doc in _schema_vector_store(lines).similarity_search(nl_query, k=k):
+        selected.add(doc.page_content)
+
+    return [line for line in lines if line in selected]
+
+def schema_to_mongo_nl(nl_query: str, mongo_schema: dict, collection: str = "patient_records"):
+    from langchain_groq import ChatGroq
+    from langchain_core.prompts import PromptTemplate
+
+    load_dotenv()
+    groq_api_key = os.getenv("GROQ_API_KEY")
+
+    context = "\n".join(relevant_schema_lines(nl_query, mongo_schema))
 
     llm = ChatGroq(api_key=groq_api_key, model='llama3-70b-8192')
     prompt_template = PromptTemplate(
-        input_variables=["context", "question"],
+        input_variables=["context", "question", "collection"],
         template="""
 You are a MongoDB expert. Based on the schema provided and the user's natural language question, 
 generate ONLY the MongoDB aggregation pipeline in valid JSON format.
 
+The pipeline will be run on the "{collection}" collection.
+
 Important: 
+- Refer to fields without the collection prefix shown in the schema
+- Fields of any other collection can only be reached through a $lookup stage
 - Return ONLY the aggregation pipeline array in JSON format
 - Do not include any explanations or markdown formatting
-- For yes/no fields like diabetes, use: {{"$regex": "^yes$", "$options": "i"}}
+- When a field lists its values, match one of them exactly, e.g. {{"diabetes": "yes"}}; do not use $regex
+- Put filters on indexed fields in the first $match stage
 - Ensure all field names are properly quoted
 - Use proper MongoDB syntax for all operators
 
-Schema Context:
+Schema Context (collection.field: type; known values; range; indexed):
 {context}
 
 Natural Language Question: {question}
@@ -52,12 +129,5 @@ ONLY return the aggregation pipeline array in JSON format:
 """
     )
 
-    qa_chain = RetrievalQA.from_chain_type(
-        llm=llm,
-        retriever=retriever,
-        chain_type="stuff",
-        chain_type_kwargs={"prompt": prompt_template}
-    )
-
-    response = qa_chain.invoke({"query": nl_query})
-    return response["result"]
\ No newline at end of file
+    response = llm.invoke(prompt_template.format(context=context, question=nl_query, collection=collection))
+    return response.content
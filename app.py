@@ -1,23 +1,52 @@
 from flask import Flask, request, render_template, redirect, url_for, flash, session, jsonify
 from flask_pymongo import PyMongo
 from bson import ObjectId
+from functools import wraps
+import gzip
+import hashlib
 import os
+import threading
+from data_version import get_data_version
+
+try:
+    import brotli
+except ImportError:  # br is optional, gzip is always available
+    brotli = None
 
 # Flask app setup
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'supersecretkey')
 app.config['MONGO_URI'] = os.getenv('MONGO_URI', 'mongodb://localhost:27017/synthetic_ehr')
 
-# Initialize PyMongo
-mongo = PyMongo(app)
-db = mongo.cx.get_database('synthetic_ehr')
+# PyMongo is bound to the app on first use so importing this module stays cheap
+mongo = PyMongo()
+_db = None
+_db_lock = threading.Lock()
+_indexes_ready = False
 
-# Confirm DB connection
-try:
-    print("✅ Connected to MongoDB:", db.name)
-except Exception as e:
-    print("❌ MongoDB connection failed:", str(e))
-    raise
+def get_db():
+    global _db, _indexes_ready
+    if _db is None or not _indexes_ready:
+        with _db_lock:
+            if _db is None:
+                try:
+                    if mongo.cx is None:
+                        mongo.init_app(app)
+                    _db = mongo.cx.get_database('synthetic_ehr')
+                    print("✅ Connected to MongoDB:", _db.name)
+                except Exception as e:
+                    print("❌ MongoDB connection failed:", str(e))
+                    raise
+            if not _indexes_ready:
+                # Indexes backing the keyset-paginated API reads; retried on the
+                # next call if Mongo is briefly unavailable
+                try:
+                    _db.patient_records.create_index("patient_id")
+                    _db.patient_doctor_connections.create_index([("doctor_id", 1), ("patient_id", 1)])
+                    _indexes_ready = True
+                except Exception as e:
+                    print("⚠️ Could not create API indexes:", str(e))
+    return _db
 
 # Serve HTML frontend
 @app.route('/', methods=['GET'])
@@ -34,11 +63,12 @@ def login():
     if not role or not username or not password:
         return jsonify({"success": False, "message": "All fields are required."}), 400
     
-    # Use 'username' field instead of 'email'
+    # Admins log in by 'username'; doctors by the 'doctor_id' used across the EHR data
+    db = get_db()
     if role == 'admin':
         user = db.admin_login.find_one({"username": username, "password": password})
     elif role == 'doctor':
-        user = db.doctor_login.find_one({"username": username, "password": password})
+        user = db.doctor_login.find_one({"doctor_id": username, "password": password})
     else:
         return jsonify({"success": False, "message": "Invalid role."}), 400
     
@@ -46,6 +76,8 @@ def login():
         session['user_id'] = str(user['_id'])
         session['user_role'] = role
         session['username'] = username
+        if role == 'doctor':
+            session['doctor_id'] = user['doctor_id']
         
         return jsonify({
             "success": True,
@@ -66,11 +98,182 @@ def logout():
 @app.route('/health')
 def health_check():
     try:
-        mongo.db.command('ping')
+        get_db().command('ping')
         return "Database connection working!", 200
     except Exception as e:
         return f"Database connection failed: {str(e)}", 500
 
+# ---------------- REST API ----------------
+PATIENT_FIELDS = [
+    "patient_id", "name", "age", "gender", "address", "contact",
+    "diabetes", "blood_pressure", "arthritis", "asthma", "thyroid"
+]
+DISEASES = ["diabetes", "blood_pressure", "arthritis", "asthma", "thyroid"]
+COHORT_GROUPS = ["gender"]
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MIN_COMPRESS_SIZE = 500
+
+def api_error(message, status):
+    return jsonify({"success": False, "message": message}), status
+
+def login_required(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if 'user_role' not in session:
+            return api_error("Login required.", 401)
+        return view(*args, **kwargs)
+    return wrapper
+
+def own_patients_only(view):
+    # Runs before etag_cached so a guessed ETag cannot turn a 403 into a 304
+    @wraps(view)
+    def wrapper(doctor_id, *args, **kwargs):
+        if session['user_role'] == 'doctor' and session.get('doctor_id') != doctor_id:
+            return api_error("Doctors can only view their own patients.", 403)
+        return view(doctor_id, *args, **kwargs)
+    return wrapper
+
+def etag_cached(view):
+    """Answer If-None-Match with a 304 when the data version has not moved.
+
+    The ETag covers the data version, the full request path and the caller,
+    so the check costs one _id lookup instead of running the query."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = get_data_version(get_db())
+        key = f"{version}:{request.full_path}:{session.get('user_role')}:{session.get('username')}"
+        etag = hashlib.sha1(key.encode()).hexdigest()[:20]
+
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+        else:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        # Weak, since the body may be re-encoded by compress_response
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
+
+def parse_page_args():
+    after = request.args.get("after") or None
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be an integer.")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+    return after, limit
+
+def parse_projection():
+    fields = request.args.get("fields")
+    if not fields:
+        selected = PATIENT_FIELDS
+    else:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in PATIENT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}.")
+    # patient_id is always returned since it is the pagination cursor
+    projection = {"_id": 0, "patient_id": 1}
+    projection.update({f: 1 for f in selected})
+    return projection
+
+def page_response(items, limit):
+    next_after = items[limit - 1]["patient_id"] if len(items) > limit else None
+    return jsonify({"items": items[:limit], "next_after": next_after})
+
+# List patients, ordered by patient_id
+@app.route('/api/patients')
+@login_required
+@etag_cached
+def api_patients():
+    try:
+        after, limit = parse_page_args()
+        projection = parse_projection()
+    except ValueError as e:
+        return api_error(str(e), 400)
+
+    query = {"patient_id": {"$gt": after}} if after else {}
+    cursor = get_db().patient_records.find(query, projection).sort("patient_id", 1).limit(limit + 1)
+    return page_response(list(cursor), limit)
+
+# List the patients connected to a doctor, ordered by patient_id
+@app.route('/api/doctors/<doctor_id>/patients')
+@login_required
+@own_patients_only
+@etag_cached
+def api_doctor_patients(doctor_id):
+    try:
+        after, limit = parse_page_args()
+        projection = parse_projection()
+    except ValueError as e:
+        return api_error(str(e), 400)
+
+    db = get_db()
+    query = {"doctor_id": doctor_id}
+    if after:
+        query["patient_id"] = {"$gt": after}
+    connections = db.patient_doctor_connections.find(
+        query, {"_id": 0, "patient_id": 1}
+    ).sort("patient_id", 1).limit(limit + 1)
+    patient_ids = [conn["patient_id"] for conn in connections]
+
+    # The cursor comes from the connections so a missing record cannot stall paging
+    next_after = patient_ids[limit - 1] if len(patient_ids) > limit else None
+    patient_ids = patient_ids[:limit]
+    items = []
+    if patient_ids:
+        items = list(db.patient_records.find(
+            {"patient_id": {"$in": patient_ids}}, projection
+        ).sort("patient_id", 1))
+    return jsonify({"items": items, "next_after": next_after})
+
+# Count patients with each condition, optionally grouped by a field
+@app.route('/api/cohorts')
+@login_required
+@etag_cached
+def api_cohorts():
+    group_by = request.args.get("group_by")
+    if group_by and group_by not in COHORT_GROUPS:
+        return api_error(f"group_by must be one of: {', '.join(COHORT_GROUPS)}.", 400)
+
+    group = {"_id": f"${group_by}" if group_by else None, "total": {"$sum": 1}}
+    for disease in DISEASES:
+        group[disease] = {"$sum": {"$cond": [{"$eq": [f"${disease}", "yes"]}, 1, 0]}}
+
+    pipeline = [{"$group": group}, {"$sort": {"_id": 1}}]
+    cohorts = []
+    for row in get_db().patient_records.aggregate(pipeline):
+        key = row.pop("_id")
+        if group_by:
+            row[group_by] = key
+        cohorts.append(row)
+    return jsonify({"cohorts": cohorts})
+
+@app.after_request
+def compress_response(response):
+    if (not request.path.startswith('/api/') or response.status_code != 200
+            or response.direct_passthrough or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        response.set_data(brotli.compress(data))
+        response.headers['Content-Encoding'] = 'br'
+    elif accepted['gzip']:
+        response.set_data(gzip.compress(data, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
 # Make sure template directory exists
 os.makedirs('templates', exist_ok=True)
 
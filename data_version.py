@@ -0,0 +1,14 @@
+# A single counter document bumped on every write to the EHR collections.
+# The REST API folds it into its ETags, so readers can revalidate with one
+# _id lookup instead of re-reading documents.
+
+VERSION_ID = "data_version"
+
+
+def get_data_version(db):
+    doc = db["meta"].find_one({"_id": VERSION_ID}, {"value": 1})
+    return doc["value"] if doc else 0
+
+
+def bump_data_version(db):
+    db["meta"].update_one({"_id": VERSION_ID}, {"$inc": {"value": 1}}, upsert=True)
@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 from pymongo import MongoClient
 from pprint import pprint
 from NL2Mongo import schema_to_mongo_nl
+from schema_introspect import get_introspector
 
 def load_mongo_connection():
     load_dotenv()
@@ -60,21 +61,9 @@ def run_mongo_query(mongo_query_str, collection):
         print(pipeline_str if 'pipeline_str' in locals() else "Pipeline extraction failed")
 
 if __name__ == "__main__":
-    mongo_schema = {
-        "patient_records": {
-            "patient_id": "string",
-            "name": "string",
-            "age": "int",
-            "gender": "string",
-            "diabetes": "yes/no",
-            "blood_pressure": "yes/no",
-            "arthritis": "yes/no",
-            "asthma": "yes/no",
-            "thyroid": "yes/no"
-        }
-    }
-
     db = load_mongo_connection()
+    # Sampled from the live collections and cached on disk between runs
+    mongo_schema = get_introspector(db).get_schema()
     collection = db["patient_records"]
     
     print("\n🔍 Collection Status:")
@@ -82,7 +71,7 @@ if __name__ == "__main__":
     print(f"Document count: {collection.count_documents({})}")
     
     nl_query = input("\n🧠 Enter a natural language question: ")
-    mongo_query_str = schema_to_mongo_nl(nl_query, mongo_schema)
+    mongo_query_str = schema_to_mongo_nl(nl_query, mongo_schema, collection=collection.name)
 
     print("\n🧠 Generated Mongo Query:")
     print(mongo_query_str)
@@ -0,0 +1,149 @@
+import argparse
+import http.client
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from app import app, get_db
+
+# Concurrent load test for the REST API in app.py. By default the app is
+# started in a separate process under Werkzeug's threaded server (or pass
+# --url to target an already running server, e.g. gunicorn), and each
+# simulated client is a thread holding its own keep-alive HTTP connection.
+# The reported p50/p99 are end-to-end request latencies over loopback HTTP,
+# including the server's threading and the reads against the Mongo the app
+# is configured for (MONGO_URI, filled by populate_ehr.py). The client
+# threads share one process, so at high client counts their own overhead is
+# part of the numbers too.
+
+CLIENT_COUNTS = [1, 4, 16, 64]
+REQUESTS_PER_CLIENT = 50
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def pick_doctor_id():
+    # Same database the app under test reads, via MONGO_URI
+    conn = get_db().patient_doctor_connections.find_one({}, {"doctor_id": 1})
+    return conn["doctor_id"] if conn else "DOC1000"
+
+
+def session_cookie():
+    # Signed the same way Flask signs its session cookie, so the run needs
+    # no stored credentials; the server must share this SECRET_KEY
+    serializer = app.session_interface.get_signing_serializer(app)
+    value = serializer.dumps({'user_role': 'admin', 'username': 'load-test'})
+    return f"{app.config.get('SESSION_COOKIE_NAME', 'session')}={value}"
+
+
+def run_client(host, port, cookie, paths, num_requests, revalidate):
+    latencies = []
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+
+    etags = {}
+    try:
+        for i in range(num_requests):
+            path = paths[i % len(paths)]
+            headers = {"Accept-Encoding": "gzip, br", "Cookie": cookie}
+            if revalidate and path in etags:
+                headers["If-None-Match"] = etags[path]
+
+            start = time.perf_counter()
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - start)
+
+            if response.status not in (200, 304):
+                raise RuntimeError(f"{path} returned {response.status}")
+            if response.getheader("ETag"):
+                etags[path] = response.getheader("ETag")
+    finally:
+        conn.close()
+    return latencies
+
+
+def run_level(host, port, cookie, paths, clients, num_requests, revalidate):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        futures = [pool.submit(run_client, host, port, cookie, paths, num_requests, revalidate)
+                   for _ in range(clients)]
+        latencies = [lat for f in futures for lat in f.result()]
+    elapsed = time.perf_counter() - start
+    return latencies, elapsed
+
+
+def start_server():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    code = ("from werkzeug.serving import run_simple; from app import app; "
+            f"run_simple('127.0.0.1', {port}, app, threaded=True)")
+    server = subprocess.Popen([sys.executable, "-c", code],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server, port
+        except OSError:
+            if server.poll() is not None:
+                break
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("API server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the EHR REST API")
+    parser.add_argument("--clients", type=int, nargs="+", default=CLIENT_COUNTS)
+    parser.add_argument("--requests", type=int, default=REQUESTS_PER_CLIENT,
+                        help="requests issued by each client")
+    parser.add_argument("--revalidate", action="store_true",
+                        help="send If-None-Match so repeat reads can be answered with 304")
+    parser.add_argument("--url", help="base URL of a running server sharing this SECRET_KEY; "
+                                      "by default one is started on a free local port")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        server, port = start_server()
+        host = "127.0.0.1"
+
+    doctor_id = pick_doctor_id()
+    paths = [
+        "/api/patients?limit=50",
+        "/api/patients?limit=20&fields=name,age,diabetes",
+        f"/api/doctors/{doctor_id}/patients",
+        "/api/cohorts",
+        "/api/cohorts?group_by=gender",
+    ]
+
+    cookie = session_cookie()
+
+    print(f"{'clients':>8} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    try:
+        for clients in args.clients:
+            latencies, elapsed = run_level(host, port, cookie, paths, clients,
+                                           args.requests, args.revalidate)
+            print(f"{clients:>8} {len(latencies):>9} {len(latencies) / elapsed:>9.1f} "
+                  f"{percentile(latencies, 50) * 1000:>9.2f} {percentile(latencies, 99) * 1000:>9.2f}")
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
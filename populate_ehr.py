@@ -1,6 +1,7 @@
 import random
 from faker import Faker
 from pymongo import MongoClient
+from data_version import bump_data_version
 
 fake = Faker()
 
@@ -70,4 +71,7 @@ for i in range(NUM_PATIENTS):
         "room_id": room_id
     })
 
+# Invalidate ETags handed out by the REST API
+bump_data_version(db)
+
 print("✅ Synthetic EHR database populated successfully!")
@@ -0,0 +1,237 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from bson import ObjectId
+
+# Collections that are never described to the LLM (credentials, bookkeeping)
+EXCLUDED_COLLECTIONS = {"admin_login", "doctor_login", "patient_login", "meta"}
+
+SAMPLE_SIZE = 500
+REFRESH_INTERVAL = 600  # seconds before a collection is re-sampled regardless
+CHECK_INTERVAL = 30  # seconds between checks for changed counts or indexes
+SCHEMA_CACHE_PATH = "schema_cache.json"
+MAX_VALUES = 12  # fields with at most this many distinct values get a value set
+ENUM_TYPES = {"string", "int", "bool"}
+CARDINALITY_CAP = 1000
+
+TYPE_NAMES = {
+    str: "string",
+    bool: "bool",
+    int: "int",
+    float: "double",
+    ObjectId: "ObjectId",
+    datetime: "date",
+    type(None): "null",
+}
+
+
+def type_name(value):
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    return TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+class _FieldStats:
+    def __init__(self):
+        self.count = 0
+        self.types = set()
+        self.values = set()
+        self.saturated = False
+        self.min = None
+        self.max = None
+
+    def add(self, value, first_in_doc=True):
+        # count is per document, so array elements only count once
+        if first_in_doc:
+            self.count += 1
+        self.types.add(type_name(value))
+
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+        if not self.saturated and not isinstance(value, (dict, list)):
+            self.values.add(value)
+            if len(self.values) >= CARDINALITY_CAP:
+                self.saturated = True
+
+    def to_dict(self, sample_count, indexed):
+        stats = {
+            "types": sorted(self.types),
+            "presence": round(self.count / sample_count, 3) if sample_count else 0.0,
+            "cardinality": len(self.values),
+            "cardinality_capped": self.saturated,
+            "indexed": indexed,
+        }
+        if (not self.saturated and 0 < len(self.values) <= MAX_VALUES
+                and self.types <= ENUM_TYPES):
+            stats["values"] = sorted(self.values, key=str)
+        if self.min is not None:
+            stats["min"] = self.min
+            stats["max"] = self.max
+        return stats
+
+
+def _add(fields, seen, path, value):
+    fields.setdefault(path, _FieldStats()).add(value, path not in seen)
+    seen.add(path)
+
+
+def _walk(doc, fields, prefix="", seen=None):
+    # seen holds the paths already counted for this document
+    if seen is None:
+        seen = set()
+    for k, v in doc.items():
+        path = prefix + k
+        if isinstance(v, dict):
+            _walk(v, fields, path + '.', seen)
+        elif isinstance(v, list):
+            _add(fields, seen, path, v)
+            for item in v:
+                if isinstance(item, dict):
+                    _walk(item, fields, path + '[].', seen)
+                else:
+                    _add(fields, seen, path + '[]', item)
+        else:
+            _add(fields, seen, path, v)
+
+
+def _indexed_fields(collection):
+    # Only the leading key: a filter on a later key of a compound index alone
+    # cannot use that index
+    return {info["key"][0][0] for info in collection.index_information().values()}
+
+
+class IntrospectedSchema(dict):
+    """{collection: {field path: stats}} as returned by get_schema(). The type
+    tells consumers such as NL2Mongo.flatten_schema apart from hand-written
+    nested schemas, whose leaves are type names."""
+
+
+class SchemaIntrospector:
+    """Infers a per-field schema for each collection from a $sample of its
+    documents and caches it.
+
+    get_schema() returns an IntrospectedSchema, where stats holds the
+    observed types, presence ratio, sample cardinality, the value set for
+    low-cardinality fields, min/max for numbers and whether the field
+    leads an index. At most every check_interval, collections are checked
+    for a changed document count or index set and re-sampled if so; a
+    collection is also re-sampled once its sample is older than
+    refresh_interval, which picks up in-place updates. With a cache_path the
+    samples are persisted, so one-shot scripts reuse them across runs."""
+
+    def __init__(self, db, sample_size=SAMPLE_SIZE, refresh_interval=REFRESH_INTERVAL,
+                 check_interval=CHECK_INTERVAL, exclude=EXCLUDED_COLLECTIONS, cache_path=None):
+        self.db = db
+        self.sample_size = sample_size
+        self.refresh_interval = refresh_interval
+        self.check_interval = check_interval
+        self.exclude = set(exclude)
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._collections = {}  # name -> {"count", "indexes", "fields", "sampled_at"}
+        self._checked_at = None
+        self._load_cache()
+
+    def get_schema(self):
+        with self._lock:
+            if self._checked_at is None or time.monotonic() - self._checked_at >= self.check_interval:
+                self._refresh()
+            return IntrospectedSchema(
+                (name, entry["fields"]) for name, entry in self._collections.items()
+            )
+
+    def refresh(self, force=False):
+        with self._lock:
+            self._refresh(force=force)
+
+    def _refresh(self, force=False):
+        names = [name for name in self.db.list_collection_names()
+                 if name not in self.exclude and not name.startswith("system.")]
+        changed = False
+
+        for name in list(self._collections):
+            if name not in names:
+                del self._collections[name]
+                changed = True
+
+        now = time.time()
+        for name in names:
+            collection = self.db[name]
+            count = collection.estimated_document_count()
+            indexes = _indexed_fields(collection)
+            cached = self._collections.get(name)
+            if (not force and cached and cached["count"] == count and cached["indexes"] == indexes
+                    and now - cached["sampled_at"] < self.refresh_interval):
+                continue
+            self._collections[name] = {
+                "count": count,
+                "indexes": indexes,
+                "fields": self._sample_collection(collection, indexes),
+                "sampled_at": now,
+            }
+            changed = True
+
+        self._checked_at = time.monotonic()
+        if changed:
+            self._save_cache()
+
+    def _sample_collection(self, collection, indexes):
+        fields = {}
+        sample_count = 0
+        for doc in collection.aggregate([{"$sample": {"size": self.sample_size}}]):
+            sample_count += 1
+            _walk(doc, fields)
+
+        return {
+            path: stats.to_dict(sample_count, path in indexes)
+            for path, stats in sorted(fields.items())
+        }
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path) as f:
+                cache = json.load(f)
+        except (OSError, ValueError) as e:
+            print("⚠️ Ignoring unreadable schema cache:", str(e))
+            return
+        if cache.get("db") != self.db.name:
+            return
+        for name, entry in cache["collections"].items():
+            entry["indexes"] = set(entry["indexes"])
+            self._collections[name] = entry
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        cache = {
+            "db": self.db.name,
+            "collections": {
+                name: {**entry, "indexes": sorted(entry["indexes"])}
+                for name, entry in self._collections.items()
+            },
+        }
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, self.cache_path)
+
+
+_introspectors = {}
+_introspectors_lock = threading.Lock()
+
+
+def get_introspector(db, cache_path=SCHEMA_CACHE_PATH):
+    """Return the shared SchemaIntrospector for db, so its cache lives as long
+    as the process (and, through cache_path, across runs)."""
+    with _introspectors_lock:
+        if db.name not in _introspectors:
+            _introspectors[db.name] = SchemaIntrospector(db, cache_path=cache_path)
+        return _introspectors[db.name]
@@ -1,28 +1,14 @@
 import streamlit as st
-from pymongo import MongoClient
-from langchain.chains import RetrievalQA
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_groq import ChatGroq
+import warmup
+from data_version import bump_data_version
 
 # --- MongoDB Setup ---
-client = MongoClient("mongodb://localhost:27017")
-db = client["synthetic_ehr"]
-patient_login_col = db["patient_login"]
-doctor_login_col = db["doctor_login"]
-admin_login_col = db["admin_login"]
-connections_col = db["patient_doctor_connections"]
-patient_col = db["patient_records"]
-
-# --- Load QA Chain ---
+# Opened on first use so the login page does not wait on the connection
 @st.cache_resource
-def load_qa_chain():
-    embeddings = HuggingFaceEmbeddings()
-    vector_store = FAISS.load_local("faiss_index", embeddings, allow_dangerous_deserialization=True)
-    llm = ChatGroq(model='llama3-70b-8192', temperature=0)
-    return RetrievalQA.from_chain_type(llm=llm, retriever=vector_store.as_retriever())
-
-qa_chain = load_qa_chain()
+def get_db():
+    from pymongo import MongoClient
+    client = MongoClient("mongodb://localhost:27017")
+    return client["synthetic_ehr"]
 
 # --- App Header ---
 def app_header():
@@ -43,10 +29,11 @@ def login():
     password = st.text_input("Password", type="password")
 
     if st.button("Login"):
+        db = get_db()
         if role == "Doctor":
-            user = doctor_login_col.find_one({"doctor_id": user_id, "password": password})
+            user = db["doctor_login"].find_one({"doctor_id": user_id, "password": password})
         else:
-            user = admin_login_col.find_one({"username": user_id, "password": password})
+            user = db["admin_login"].find_one({"username": user_id, "password": password})
 
         if user:
             st.session_state.user_id = user_id
@@ -64,8 +51,12 @@ def doctor_dashboard():
     doctor_id = st.session_state.get("user_id")
     st.write(f"Logged in as: **Dr. {doctor_id}**")
 
+    db = get_db()
+    patient_login_col = db["patient_login"]
+    patient_col = db["patient_records"]
+
     st.subheader("👥 Connected Patients")
-    connections = list(connections_col.find({"doctor_id": doctor_id}))
+    connections = list(db["patient_doctor_connections"].find({"doctor_id": doctor_id}))
     if not connections:
         st.info("No connected patients.")
         return
@@ -118,6 +109,7 @@ def doctor_dashboard():
                     "asthma": asthma,
                     "thyroid": thyroid
                 })
+                bump_data_version(db)
                 st.success(f"Patient `{new_patient_id}` added successfully.")
 
 # --- Admin Dashboard ---
@@ -125,6 +117,8 @@ def admin_dashboard():
     st.subheader("🧑‍💼 Admin Dashboard")
     st.write(f"Logged in as: **Admin {st.session_state.user_id}**")
 
+    doctor_login_col = get_db()["doctor_login"]
+
     st.subheader("➕ Add New Doctor")
     with st.form("add_doctor_form"):
         new_doc_id = st.text_input("Doctor ID", key="doc_id")
@@ -143,6 +137,21 @@ def admin_dashboard():
 # --- Chat Assistant ---
 def chat_assistant():
     st.subheader("🤖 EHR Chat Assistant")
+
+    status, error = warmup.status()
+    if status == warmup.FAILED:
+        st.error(f"Assistant failed to load: {error}")
+        if st.button("Retry"):
+            warmup.start_warmup()
+            st.rerun()
+        return
+    if status != warmup.READY:
+        st.info("⏳ The assistant is still loading, please check back in a moment.")
+        if st.button("Refresh"):
+            st.rerun()
+        return
+
+    qa_chain = warmup.get_qa_chain()
     user_input = st.text_input("Ask something about patient data:")
     if user_input:
         with st.spinner("Thinking..."):
@@ -152,6 +161,10 @@ def chat_assistant():
 # --- Main Router ---
 def main():
     app_header()
+    # Load the embedding model and FAISS index in the background once the UI is up;
+    # after a failure, retries are left to the chat page's Retry button
+    if warmup.status()[0] == warmup.IDLE:
+        warmup.start_warmup()
 
     if "logged_in" not in st.session_state or not st.session_state.get("logged_in"):
         login()
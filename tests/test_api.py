@@ -0,0 +1,125 @@
+import gzip
+import json
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_pymongo")
+mongomock = pytest.importorskip("mongomock")
+
+import app as app_module
+from data_version import bump_data_version
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = mongomock.MongoClient()["synthetic_ehr"]
+    for i in range(5):
+        db.patient_records.insert_one({
+            "patient_id": f"PAT{1000 + i}",
+            "name": f"Patient {i}",
+            "age": 30 + i,
+            "gender": "Female" if i % 2 else "Male",
+            "address": "x" * 200,
+            "diabetes": "yes" if i < 2 else "no",
+        })
+        db.patient_doctor_connections.insert_one({"patient_id": f"PAT{1000 + i}", "doctor_id": "DOC1000"})
+    monkeypatch.setattr(app_module, "get_db", lambda: db)
+    return db
+
+
+def make_client(role="admin", **session_values):
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_role'] = role
+        sess['username'] = session_values.pop("username", "tester")
+        sess.update(session_values)
+    return client
+
+
+def get_json(response):
+    data = response.get_data()
+    if response.headers.get("Content-Encoding") == "gzip":
+        data = gzip.decompress(data)
+    return json.loads(data)
+
+
+def test_login_is_required(db):
+    response = app_module.app.test_client().get("/api/patients")
+    assert response.status_code == 401
+
+
+def test_keyset_pagination(db):
+    client = make_client()
+
+    first = client.get("/api/patients?limit=2").get_json()
+    assert [p["patient_id"] for p in first["items"]] == ["PAT1000", "PAT1001"]
+    assert first["next_after"] == "PAT1001"
+
+    last = client.get("/api/patients?limit=2&after=PAT1003").get_json()
+    assert [p["patient_id"] for p in last["items"]] == ["PAT1004"]
+    assert last["next_after"] is None
+
+
+def test_projection(db):
+    body = make_client().get("/api/patients?fields=name,age&limit=1").get_json()
+    assert body["items"] == [{"patient_id": "PAT1000", "name": "Patient 0", "age": 30}]
+
+
+@pytest.mark.parametrize("query", ["fields=password", "limit=0", "limit=201", "limit=abc"])
+def test_bad_arguments_are_rejected(db, query):
+    response = make_client().get(f"/api/patients?{query}")
+    assert response.status_code == 400
+
+
+def test_matching_etag_returns_304(db):
+    client = make_client()
+    etag = client.get("/api/patients").headers["ETag"]
+
+    response = client.get("/api/patients", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_etag_changes_after_a_write(db):
+    client = make_client()
+    etag = client.get("/api/cohorts").headers["ETag"]
+
+    bump_data_version(db)
+    response = client.get("/api/cohorts", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_doctor_sees_own_patients(db):
+    client = make_client("doctor", doctor_id="DOC1000")
+    body = client.get("/api/doctors/DOC1000/patients?fields=name").get_json()
+    assert len(body["items"]) == 5
+
+
+def test_other_doctors_get_403_even_with_a_matching_etag(db):
+    etag = make_client().get("/api/doctors/DOC1000/patients").headers["ETag"]
+
+    client = make_client("doctor", doctor_id="DOC1001")
+    response = client.get("/api/doctors/DOC1000/patients", headers={"If-None-Match": etag})
+    assert response.status_code == 403
+    assert "ETag" not in response.headers
+
+
+def test_cohort_counts(db):
+    body = make_client().get("/api/cohorts").get_json()
+    assert body["cohorts"][0]["total"] == 5
+    assert body["cohorts"][0]["diabetes"] == 2
+
+
+def test_gzip_only_above_min_size(db):
+    client = make_client()
+    headers = {"Accept-Encoding": "gzip"}
+
+    small = client.get("/api/patients?fields=age&limit=1", headers=headers)
+    assert len(small.get_data()) < app_module.MIN_COMPRESS_SIZE
+    assert "Content-Encoding" not in small.headers
+
+    large = client.get("/api/patients", headers=headers)
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert len(get_json(large)["items"]) == 5
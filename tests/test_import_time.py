@@ -0,0 +1,51 @@
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time for the cheap entry points, in microseconds
+IMPORT_BUDGET_US = 1_500_000
+HEAVY_PREFIXES = ("langchain", "langchain_groq", "sentence_transformers")
+
+for module in ("dotenv", "pymongo"):
+    if importlib.util.find_spec(module) is None:
+        pytest.skip(f"{module} is not installed", allow_module_level=True)
+
+MODULES = ["NL2Mongo", "execute", "warmup"]
+if importlib.util.find_spec("flask") and importlib.util.find_spec("flask_pymongo"):
+    MODULES.append("app")
+# main() is behind __main__, so importing the Streamlit app only defines the pages
+if importlib.util.find_spec("streamlit"):
+    MODULES.append("streamlit_app")
+
+
+@pytest.fixture(scope="module")
+def import_result():
+    code = (
+        f"import {', '.join(MODULES)}, sys\n"
+        f"print([m for m in sys.modules if m.startswith({HEAVY_PREFIXES!r})])"
+    )
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+
+
+def test_heavy_dependencies_are_not_imported(import_result):
+    assert import_result.stdout.strip() == "[]"
+
+
+def test_import_time_stays_under_budget(import_result):
+    # -X importtime lines: "import time: self [us] | cumulative | imported package";
+    # top-level imports have no leading indentation in the package column
+    total = 0
+    for line in import_result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\S.*)$", line)
+        if match:
+            total += int(match.group(1))
+    assert 0 < total < IMPORT_BUDGET_US, f"cold import took {total} us"
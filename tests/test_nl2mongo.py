@@ -0,0 +1,96 @@
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("bson")
+
+import NL2Mongo
+from NL2Mongo import flatten_schema, relevant_schema_lines
+from schema_introspect import IntrospectedSchema
+
+SCHEMA = IntrospectedSchema({
+    "patient_records": {
+        "_id": {"types": ["ObjectId"], "cardinality": 50, "indexed": True},
+        "patient_id": {"types": ["string"], "cardinality": 50, "indexed": True},
+        "age": {"types": ["int"], "cardinality": 40, "min": 18, "max": 90, "indexed": False},
+        "gender": {"types": ["string"], "cardinality": 3, "values": ["Female", "Male", "Other"], "indexed": False},
+        "diabetes": {"types": ["string"], "cardinality": 2, "values": ["no", "yes"], "indexed": False},
+        "blood_pressure": {"types": ["string"], "cardinality": 2, "values": ["no", "yes"], "indexed": False},
+    }
+})
+
+
+class FakeStore:
+    def similarity_search(self, query, k):
+        return []
+
+
+@pytest.fixture(autouse=True)
+def no_embeddings(monkeypatch):
+    monkeypatch.setattr(NL2Mongo, "_schema_vector_store", lambda lines: FakeStore())
+
+
+def test_flatten_describes_stats():
+    lines = dict(flatten_schema(SCHEMA))
+
+    assert "patient_records.diabetes: string; values: no, yes" in lines
+    assert "patient_records.age: int; range: 18 to 90" in lines
+    assert "patient_records.patient_id: string; indexed" in lines
+
+
+def test_flatten_accepts_hand_written_schemas():
+    fields = flatten_schema({"patient_records": {"age": "int", "visits": [{"ward": "string"}]}})
+
+    assert [line for line, _ in fields] == ["patient_records.age: int", "patient_records.visits[].ward: string"]
+
+
+def test_field_named_types_is_not_mistaken_for_stats():
+    schema = IntrospectedSchema({
+        "products": {
+            "name": {"types": ["string"], "indexed": False},
+            "types": {"types": ["array"], "indexed": True},
+            "types[]": {"types": ["string"], "values": ["a", "b"], "indexed": False},
+        }
+    })
+    lines = [line for line, _ in flatten_schema(schema)]
+
+    assert lines == [
+        "products.name: string",
+        "products.types: array; indexed",
+        "products.types[]: string; values: a, b",
+    ]
+
+    hand_written = flatten_schema({"products": {"name": "string", "types": "array"}})
+    assert [line for line, _ in hand_written] == ["products.name: string", "products.types: array"]
+
+
+def test_fields_are_selected_by_name():
+    lines = relevant_schema_lines("How many patients have blood pressure?", SCHEMA)
+
+    assert lines == ["patient_records.blood_pressure: string; values: no, yes"]
+
+
+def test_fields_are_selected_by_value():
+    lines = relevant_schema_lines("List Female patients", SCHEMA)
+
+    assert lines == ["patient_records.gender: string; values: Female, Male, Other"]
+
+
+def test_id_does_not_match_every_collection():
+    lines = relevant_schema_lines("Show the patient id of each patient", SCHEMA)
+
+    assert lines == ["patient_records.patient_id: string; indexed"]
+
+
+def test_flag_values_are_not_keywords():
+    # "no" must not pull in every yes/no flag
+    assert relevant_schema_lines("patients with no records", SCHEMA) == []
+
+
+def test_common_word_values_are_not_keywords():
+    # gender has the value "Other", which should not match ordinary prose
+    assert relevant_schema_lines("Which other patients are over 60?", SCHEMA) == []
+
+
+def test_empty_schema_is_rejected():
+    with pytest.raises(ValueError, match="no fields"):
+        relevant_schema_lines("How many patients?", {})
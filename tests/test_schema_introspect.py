@@ -0,0 +1,135 @@
+import pytest
+
+pytest.importorskip("bson")
+
+from schema_introspect import MAX_VALUES, SchemaIntrospector, _indexed_fields, _walk
+
+
+def walk_all(docs):
+    fields = {}
+    for doc in docs:
+        _walk(doc, fields)
+    return {path: stats.to_dict(len(docs), path == "patient_id") for path, stats in fields.items()}
+
+
+def test_flags_get_types_and_value_sets():
+    schema = walk_all([
+        {"patient_id": "PAT1000", "age": 30, "diabetes": "yes"},
+        {"patient_id": "PAT1001", "age": 50, "diabetes": "no"},
+    ])
+
+    assert schema["diabetes"]["types"] == ["string"]
+    assert schema["diabetes"]["values"] == ["no", "yes"]
+    assert schema["diabetes"]["cardinality"] == 2
+    assert schema["age"]["min"] == 30 and schema["age"]["max"] == 50
+    assert schema["patient_id"]["indexed"] is True
+    assert schema["age"]["indexed"] is False
+
+
+def test_nested_and_array_paths():
+    schema = walk_all([
+        {"address": {"city": "Pune"}, "visits": [{"ward": "A"}, {"ward": "B"}], "tags": ["x", "y", "z"]},
+        {"address": {"city": "Goa"}, "tags": ["x"]},
+    ])
+
+    assert schema["address.city"]["values"] == ["Goa", "Pune"]
+    assert schema["visits"]["types"] == ["array"]
+    assert schema["visits[].ward"]["values"] == ["A", "B"]
+    assert schema["tags[]"]["values"] == ["x", "y", "z"]
+
+
+def test_presence_counts_each_document_once():
+    schema = walk_all([
+        {"tags": ["x", "y", "z"], "visits": [{"ward": "A"}, {"ward": "B"}]},
+        {"tags": ["x"]},
+    ])
+
+    assert schema["tags"]["presence"] == 1.0
+    assert schema["tags[]"]["presence"] == 1.0
+    assert schema["visits[].ward"]["presence"] == 0.5
+
+
+def test_high_cardinality_fields_have_no_value_set():
+    schema = walk_all([{"name": f"patient {i}"} for i in range(MAX_VALUES + 1)])
+
+    assert schema["name"]["cardinality"] == MAX_VALUES + 1
+    assert "values" not in schema["name"]
+
+
+def test_doubles_are_not_enumerated():
+    schema = walk_all([{"score": 1.5}, {"score": 2.5}])
+
+    assert schema["score"]["types"] == ["double"]
+    assert "values" not in schema["score"]
+    assert schema["score"]["min"] == 1.5
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.samples = 0
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+    def index_information(self):
+        return {"_id_": {"key": [("_id", 1)]}}
+
+    def aggregate(self, pipeline):
+        self.samples += 1
+        return iter(self.docs)
+
+
+class FakeDB:
+    name = "synthetic_ehr"
+
+    def __init__(self, collections):
+        self.collections = collections
+
+    def list_collection_names(self):
+        return list(self.collections)
+
+    def __getitem__(self, name):
+        return self.collections[name]
+
+
+def test_in_place_updates_are_picked_up_once_the_sample_expires():
+    patients = FakeCollection([{"diabetes": "yes"}, {"diabetes": "no"}])
+    db = FakeDB({"patient_records": patients, "doctor_login": FakeCollection([{"password": "x"}])})
+    introspector = SchemaIntrospector(db, refresh_interval=60, check_interval=0)
+
+    schema = introspector.get_schema()
+    assert list(schema) == ["patient_records"]
+    assert schema["patient_records"]["diabetes"]["values"] == ["no", "yes"]
+
+    # Same count and indexes: the cached sample is reused
+    patients.docs[0]["diabetes"] = "Yes"
+    introspector.get_schema()
+    assert patients.samples == 1
+
+    introspector._collections["patient_records"]["sampled_at"] -= 61
+    schema = introspector.get_schema()
+    assert patients.samples == 2
+    assert schema["patient_records"]["diabetes"]["values"] == ["Yes", "no"]
+
+
+def test_cache_is_reused_across_instances(tmp_path):
+    cache_path = str(tmp_path / "schema_cache.json")
+    patients = FakeCollection([{"age": 30}, {"age": 50}])
+    db = FakeDB({"patient_records": patients})
+
+    first = SchemaIntrospector(db, cache_path=cache_path).get_schema()
+    second = SchemaIntrospector(db, cache_path=cache_path).get_schema()
+
+    assert patients.samples == 1
+    assert second == first
+
+
+def test_only_leading_index_keys_count_as_indexed():
+    connections = FakeCollection([])
+    connections.index_information = lambda: {
+        "_id_": {"key": [("_id", 1)]},
+        "doctor_id_1_patient_id_1": {"key": [("doctor_id", 1), ("patient_id", 1)]},
+    }
+
+    assert _indexed_fields(connections) == {"_id", "doctor_id"}
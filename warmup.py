@@ -0,0 +1,60 @@
+import threading
+
+# Readiness states for the background QA chain loader
+IDLE = "idle"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+_lock = threading.Lock()
+_state = {"status": IDLE, "error": None, "qa_chain": None}
+
+
+def _load_qa_chain():
+    # Heavy imports live here so they run on the warm-up thread, not at import
+    from langchain.chains import RetrievalQA
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from langchain_groq import ChatGroq
+
+    embeddings = HuggingFaceEmbeddings()
+    vector_store = FAISS.load_local("faiss_index", embeddings, allow_dangerous_deserialization=True)
+    llm = ChatGroq(model='llama3-70b-8192', temperature=0)
+    return RetrievalQA.from_chain_type(llm=llm, retriever=vector_store.as_retriever())
+
+
+def _run():
+    try:
+        qa_chain = _load_qa_chain()
+    except Exception as e:
+        with _lock:
+            _state["status"] = FAILED
+            _state["error"] = str(e)
+        return
+
+    with _lock:
+        _state["qa_chain"] = qa_chain
+        _state["status"] = READY
+
+
+def start_warmup():
+    """Start loading the QA chain in the background. Safe to call repeatedly;
+    a failed load is retried on the next call."""
+    with _lock:
+        if _state["status"] in (LOADING, READY):
+            return
+        _state["status"] = LOADING
+        _state["error"] = None
+
+    threading.Thread(target=_run, name="qa-warmup", daemon=True).start()
+
+
+def status():
+    with _lock:
+        return _state["status"], _state["error"]
+
+
+def get_qa_chain():
+    """Return the loaded QA chain, or None if it is not ready yet."""
+    with _lock:
+        return _state["qa_chain"]